@@ -1,5 +1,12 @@
+import { promises as fsp } from 'fs';
+import os from 'os';
+import { dirname, resolve } from 'path';
 import { DateTime } from 'luxon';
 import { Anthropic } from 'anthropic';
+import imghash from 'imghash';
+import PQueue from 'p-queue';
+import { parse as parsePartialJson, Allow } from 'partial-json';
+import Piscina from 'piscina';
 import { ImageProcessor } from './utils/image-processor';
 
 export interface Area {
@@ -30,64 +37,9 @@ export interface Assessment {
   };
 }
 
-export class BasicSpaceAnalyzer {
-  private anthropic: Anthropic;
-
-  constructor(apiKey: string) {
-    this.anthropic = new Anthropic({ apiKey });
-  }
-
-  private async checkImageFile(imagePath: string): Promise<boolean> {
-    try {
-      // Use fs module to check file existence and readability in Node.js
-      const fs = require('fs');
-      if (!fs.existsSync(imagePath)) {
-        console.error(`Error: Image file '${imagePath}' not found!`);
-        return false;
-      }
-
-      // Read the file to check for readability
-      fs.readFileSync(imagePath);
-      return true;
-    } catch (error) {
-      console.error(`Error checking image file: ${error}`);
-      return false;
-    }
-  }
-
-  async analyzeImage(imagePath: string, maxRetries = 3): Promise<Assessment | null> {
-    if (!(await this.checkImageFile(imagePath))) {
-      return null;
-    }
-
-    let retryCount = 0;
-    let compressedImagePath: string | null = null;
-
-    while (retryCount < maxRetries) {
-      try {
-        // Compress image if needed
-        if (!compressedImagePath || !(await ImageProcessor.verifySize(compressedImagePath))) {
-          console.log('Compressing image...');
-          compressedImagePath = await ImageProcessor.compressImage(imagePath, 3);
-
-          // Verify the compression worked
-          if (!(await ImageProcessor.verifySize(compressedImagePath))) {
-            console.warn('Warning: Unable to compress image sufficiently');
-            return null;
-          }
-        }
-
-        // Read and encode compressed image
-        const imageData = await ImageProcessor.readAndEncodeImage(compressedImagePath);
-
-        const actualSizeMb = imageData.length / 1024 / 1024;
-        console.log(`Sending image to Claude (size: ${actualSizeMb.toFixed(2)}MB)`);
-
-        // Prepare the prompt for 5S analysis
-        const prompt = `Analyze this workplace image for 5S using a 60-point scoring system:
-
- 
-                5S Components (50 points total):
+// 5S scoring rubric sent with every image. Kept at module level so the text is byte-for-byte
+// identical across calls, which Anthropic prompt caching requires for a cache hit.
+const SCORING_RUBRIC = `                5S Components (50 points total):
                 Sort (10 points total): Evaluate the organization and removal of unnecessary items in all areas.
                     * Look for: 
                       - **Furniture & Equipment**: Are work benches, carts, machines, equipment, cabinets, tool boxes, shelves, and other fixtures free from unnecessary items? Ensure that the workspace is clear of clutter and excess items that do not contribute to the task at hand.
@@ -161,7 +113,7 @@ export class BasicSpaceAnalyzer {
 ""
 
 
-  Provide your analysis in this exact JSON format:
+  Provide your analysis in this exact JSON format, where "confidence" is how certain you are of the scores (0.0 to 1.0):
                 {
                     "scores": {
                         "sort": {"score": 0, "observations": "detailed findings"},
@@ -184,78 +136,367 @@ export class BasicSpaceAnalyzer {
                         "immediate": ["actions needed in 24-48 hours"],
                         "short_term": ["actions needed in 1-2 weeks"],
                         "long_term": ["actions needed in 1-3 months"]
-                    }
+                    },
+                    "confidence": 0.0
                 }
 `;
 
-        // Get Claude's analysis
-        const response = await this.anthropic.messages.create({
-          model: 'claude-3-sonnet-20240229',
-          maxTokens: 1500,
-          temperature: 0,
-          messages: [
-            {
-              role: 'user',
-              content: [
-                {
-                  type: 'text',
-                  text: prompt,
-                },
-                {
-                  type: 'image',
-                  source: {
-                    type: 'base64',
-                    mediaType: 'image/jpeg',
-                    data: imageData,
-                  },
-                },
-              ],
-            },
-          ],
-        });
+// Cheap first-pass model; results it is unsure about are re-run on the stronger model
+const FIRST_PASS_MODEL = 'claude-3-haiku-20240307';
+const ESCALATION_MODEL = 'claude-3-sonnet-20240229';
+const ESCALATION_CONFIDENCE = 0.7;
+
+// Output token budget: the initial one covers the usual JSON reply and keeps generation short;
+// a reply cut off by it is retried with double the budget, up to the ceiling
+const INITIAL_MAX_TOKENS = 900;
+const MAX_TOKENS_CEILING = 4096;
+
+// The model hit its token budget before finishing the JSON
+class TruncatedResponseError extends Error {}
+
+// Worker-thread pool for image compression, shared by every analyzer instance
+const compressPool = new Piscina({
+  filename: resolve(__dirname, 'utils/compress-image-worker.js'),
+  maxThreads: os.cpus().length,
+});
+
+// Images whose perceptual hashes differ by fewer bits than this are treated as the same scene
+const PHASH_MATCH_DISTANCE = 5;
+
+// Short per-image instruction sent after the cached rubric
+const IMAGE_INSTRUCTION =
+  'Analyze this workplace image for 5S using the 60-point scoring system above. ' +
+  'Respond with ONLY valid JSON, no preamble.';
+
+// Prompt content blocks shared by every request; only the image block is built per call
+const PROMPT_BLOCKS = Object.freeze([
+  Object.freeze({
+    type: 'text',
+    text: SCORING_RUBRIC,
+    cacheControl: Object.freeze({ type: 'ephemeral' }),
+  }),
+  Object.freeze({
+    type: 'text',
+    text: IMAGE_INSTRUCTION,
+  }),
+]);
+
+// A compressed copy of an area image, ready to send to Claude
+export interface PreparedImage {
+  compressedImagePath: string;
+  imageData: string;
+}
+
+// Called as soon as the streamed response's "scores" object is complete
+export type ScoresReadyCallback = (scores: Assessment['scores']) => void;
+
+export class BasicSpaceAnalyzer {
+  private anthropic: Anthropic;
+  private phashCachePath: string;
+  private phashCache: Map<bigint, Assessment> | null = null;
+  private phashSave: Promise<void> = Promise.resolve();
 
-        // Parse response
-        const analysis = JSON.parse(response.content[0].text);
-        return analysis;
+  constructor(apiKey: string, phashCachePath = 'data/phash_cache.json') {
+    this.anthropic = new Anthropic({ apiKey });
+    this.phashCachePath = phashCachePath;
+  }
+
+  async computePHash(imagePath: string): Promise<bigint> {
+    // imghash computes a blockhash; 8 blocks per side -> 64 bits
+    const hex = await imghash.hash(imagePath, 8, 'hex');
+    return BigInt(`0x${hex}`);
+  }
+
+  private hammingDistance(a: bigint, b: bigint): number {
+    let x = a ^ b;
+    let count = 0;
+    while (x) {
+      x &= x - 1n;
+      count++;
+    }
+    return count;
+  }
+
+  private async loadPHashCache(): Promise<Map<bigint, Assessment>> {
+    if (!this.phashCache) {
+      this.phashCache = new Map();
+      try {
+        const stored = JSON.parse(await fsp.readFile(this.phashCachePath, 'utf8'));
+        for (const [hex, assessment] of Object.entries(stored)) {
+          this.phashCache.set(BigInt(`0x${hex}`), assessment as Assessment);
+        }
       } catch (error) {
-        console.error(`Error parsing response: ${error}`);
-        console.error(`Raw response: ${response.content}`);
-        retryCount++;
-        continue;
+        if (error.code !== 'ENOENT') {
+          console.warn(`Warning: Could not read pHash cache ${this.phashCachePath}: ${error}`);
+        }
+      }
+    }
+    return this.phashCache;
+  }
+
+  private async findCachedAssessment(hash: bigint): Promise<Assessment | null> {
+    for (const [cachedHash, assessment] of await this.loadPHashCache()) {
+      if (this.hammingDistance(hash, cachedHash) < PHASH_MATCH_DISTANCE) {
+        return assessment;
+      }
+    }
+    return null;
+  }
+
+  private async storeCachedAssessment(hash: bigint, assessment: Assessment): Promise<void> {
+    const cache = await this.loadPHashCache();
+    cache.set(hash, assessment);
+
+    // Chain writes so concurrent assessAreas workers never interleave on the file
+    const data = JSON.stringify(
+      Object.fromEntries([...cache].map(([key, value]) => [key.toString(16), value]))
+    );
+    this.phashSave = this.phashSave.then(async () => {
+      try {
+        await fsp.mkdir(dirname(this.phashCachePath), { recursive: true });
+        await fsp.writeFile(this.phashCachePath, data);
       } catch (error) {
-        console.error(`Attempt ${retryCount + 1} failed: ${error}`);
-        retryCount++;
-        if (retryCount < maxRetries) {
-          console.log('Waiting before retry...');
-          await new Promise((resolve) => setTimeout(resolve, 5000)); // Wait for 5 seconds
-          continue;
+        console.warn(`Warning: Could not write pHash cache ${this.phashCachePath}: ${error}`);
+      }
+    });
+    await this.phashSave;
+  }
+
+  private async checkImageFile(imagePath: string): Promise<{ exists: boolean; sizeMb: number }> {
+    try {
+      // One stat covers existence and size; permission problems surface where the file is actually opened
+      const fs = require('fs');
+      const stats = await fs.promises.stat(imagePath);
+      return { exists: true, sizeMb: stats.size / 1024 / 1024 };
+    } catch (error) {
+      if (error.code === 'ENOENT') {
+        console.error(`Error: Image file '${imagePath}' not found!`);
+      } else {
+        console.error(`Error checking image file: ${error}`);
+      }
+      return { exists: false, sizeMb: 0 };
+    }
+  }
+
+  private isAmbiguous(analysis: any): boolean {
+    const confidence = typeof analysis.confidence === 'number' ? analysis.confidence : 0;
+    if (confidence < ESCALATION_CONFIDENCE) {
+      return true;
+    }
+
+    // Any category without observations means the model didn't really look
+    return Object.values(analysis.scores ?? {}).some(
+      (data: any) => !data?.observations?.trim()
+    );
+  }
+
+  // Hot path: one streamed request to Claude and a JSON parse, with no error handling of its own.
+  // `onScores` fires once per attempt, as soon as "scores" has closed in the stream (or at the end
+  // if the model put it last), so callers can start on the scores while the rest is generated.
+  private async attemptAnalysis(
+    model: string,
+    imageData: string,
+    onScores?: ScoresReadyCallback,
+    maxTokens = INITIAL_MAX_TOKENS
+  ): Promise<any> {
+    const stream = this.anthropic.messages.stream({
+      model,
+      maxTokens,
+      temperature: 0,
+      messages: [
+        {
+          role: 'user',
+          content: [
+            ...PROMPT_BLOCKS,
+            {
+              type: 'image',
+              source: {
+                type: 'base64',
+                mediaType: 'image/jpeg',
+                data: imageData,
+              },
+            },
+          ],
+        },
+      ],
+    });
+
+    let scoresSent = false;
+    if (onScores) {
+      stream.on('text', (delta: string, snapshot: string) => {
+        // Objects can only close on '}', so skip the partial parse for every other delta
+        if (scoresSent || !delta.includes('}')) {
+          return;
         }
-      } finally {
-        // Clean up compressed image
-        if (compressedImagePath) {
-          try {
-            const fs = require('fs');
-            fs.unlinkSync(compressedImagePath);
-          } catch (error) {
-            console.warn(`Warning: Could not remove temporary file ${compressedImagePath}: ${error}`);
+        try {
+          const partial = parsePartialJson(snapshot, Allow.ALL);
+          const keys = Object.keys(partial ?? {});
+          // "scores" is complete once the model has moved on to a later key
+          if (keys.includes('scores') && keys[keys.length - 1] !== 'scores') {
+            scoresSent = true;
+            onScores(partial.scores);
+          }
+        } catch (error) {
+          // Not parseable yet; try again on the next delta
+        }
+      });
+    }
+
+    const response = await stream.finalMessage();
+    if (response.stopReason === 'max_tokens') {
+      throw new TruncatedResponseError(`Response cut off at ${maxTokens} tokens`);
+    }
+    const analysis = JSON.parse(response.content[0].text.trim());
+    if (onScores && !scoresSent) {
+      onScores(analysis.scores);
+    }
+    return analysis;
+  }
+
+  private removeTempFile(filePath: string): void {
+    try {
+      const fs = require('fs');
+      fs.unlinkSync(filePath);
+    } catch (error) {
+      console.warn(`Warning: Could not remove temporary file ${filePath}: ${error}`);
+    }
+  }
+
+  // CPU stage: compress and encode the image so it is ready to send
+  async prepareImage(imagePath: string): Promise<PreparedImage | null> {
+    if (!(await this.checkImageFile(imagePath)).exists) {
+      return null;
+    }
+
+    console.log('Compressing image...');
+    const compressedImagePath: string = await compressPool.run({ imagePath, maxSizeMb: 3 });
+
+    // Verify the compression worked
+    if (!(await ImageProcessor.verifySize(compressedImagePath))) {
+      console.warn('Warning: Unable to compress image sufficiently');
+      this.removeTempFile(compressedImagePath);
+      return null;
+    }
+
+    // Read and encode compressed image
+    const imageData = await ImageProcessor.readAndEncodeImage(compressedImagePath);
+    return { compressedImagePath, imageData };
+  }
+
+  // Network stage: send a prepared image to Claude, retrying as needed.
+  // Pass `prepared` to reuse an image compressed ahead of time; it is cleaned up here either way.
+  async analyzeImage(
+    imagePath: string,
+    maxRetries = 3,
+    prepared?: PreparedImage | null,
+    onScores?: ScoresReadyCallback
+  ): Promise<Assessment | null> {
+    if (prepared === undefined) {
+      prepared = await this.prepareImage(imagePath);
+    }
+    if (!prepared) {
+      return null;
+    }
+
+    let retryCount = 0;
+    let model = FIRST_PASS_MODEL;
+    let maxTokens = INITIAL_MAX_TOKENS;
+
+    try {
+      const actualSizeMb = prepared.imageData.length / 1024 / 1024;
+      console.log(`Sending image to Claude (size: ${actualSizeMb.toFixed(2)}MB)`);
+
+      while (retryCount < maxRetries) {
+        try {
+          // Get Claude's analysis
+          const analysis = await this.attemptAnalysis(model, prepared.imageData, onScores, maxTokens);
+
+          // Escalate to the stronger model only when the first pass is unsure
+          if (model === FIRST_PASS_MODEL && this.isAmbiguous(analysis)) {
+            console.log('First-pass analysis is ambiguous, escalating...');
+            model = ESCALATION_MODEL;
+            continue;
+          }
+          return analysis;
+        } catch (error) {
+          retryCount++;
+
+          // Reply ran out of tokens: the same request would be cut off again, so give it more room
+          if (error instanceof TruncatedResponseError) {
+            console.error(`${error}, retrying with a larger budget`);
+            maxTokens = Math.min(maxTokens * 2, MAX_TOKENS_CEILING);
+            continue;
+          }
+
+          // Malformed JSON from the model: ask again straight away
+          if (error instanceof SyntaxError) {
+            console.error(`Error parsing response: ${error}`);
+            continue;
+          }
+
+          // Network/API failure: back off before retrying
+          console.error(`Attempt ${retryCount} failed: ${error}`);
+          if (retryCount < maxRetries) {
+            console.log('Waiting before retry...');
+            await new Promise((resolve) => setTimeout(resolve, 5000)); // Wait for 5 seconds
           }
         }
       }
+    } finally {
+      // Clean up compressed image once, after the last attempt
+      this.removeTempFile(prepared.compressedImagePath);
     }
 
     throw new Error('Failed to analyze image after maximum retries');
   }
 
-  async assessArea(area: Area): Promise<Assessment | null> {
+  // Hash the area's image and look for an assessment of a near-identical photo.
+  // `hash` is null when the image couldn't be hashed.
+  async lookupCachedAssessment(
+    area: Area
+  ): Promise<{ hash: bigint | null; cached: Assessment | null }> {
+    try {
+      const hash = await this.computePHash(area.imagePath);
+      const cached = await this.findCachedAssessment(hash);
+      if (!cached) {
+        return { hash, cached: null };
+      }
+      console.log(`Reusing cached assessment for near-duplicate image: ${area.imagePath}`);
+      return { hash, cached: { ...cached, timestamp: DateTime.now().toISO(), areaName: area.name } };
+    } catch (error) {
+      console.warn(`Warning: Could not hash image ${area.imagePath}: ${error}`);
+      return { hash: null, cached: null };
+    }
+  }
+
+  // Pass `hash` when lookupCachedAssessment has already been checked for this area
+  async assessArea(
+    area: Area,
+    prepared?: PreparedImage | null,
+    hash?: bigint | null
+  ): Promise<Assessment | null> {
+    // Skip Claude entirely if we've already assessed a near-identical photo
+    if (hash === undefined) {
+      const lookup = await this.lookupCachedAssessment(area);
+      if (lookup.cached) {
+        if (prepared) {
+          this.removeTempFile(prepared.compressedImagePath);
+        }
+        return lookup.cached;
+      }
+      hash = lookup.hash;
+    }
+
     console.log(`Analyzing image: ${area.imagePath}`);
-    const analysis = await this.analyzeImage(area.imagePath);
+    // Sum the category scores while the rest of the response is still streaming.
+    // Each attempt reports its scores, so the last value matches the analysis we get back.
+    let baseScore = 0;
+    const analysis = await this.analyzeImage(area.imagePath, 3, prepared, (scores) => {
+      baseScore = Object.values(scores).reduce((sum, data) => sum + data.score, 0);
+    });
 
     if (analysis) {
       // Calculate total score (including safety deductions)
-      const baseScore = Object.values(analysis.scores).reduce(
-        (sum, data) => sum + data.score,
-        0
-      );
       const safetyDeductions = analysis.safetyHazards.reduce(
         (sum, hazard) => sum + hazard.deduction,
         0
@@ -277,60 +518,109 @@ export class BasicSpaceAnalyzer {
         recommendations: analysis.recommendations,
       };
 
+      if (hash !== null) {
+        await this.storeCachedAssessment(hash, assessment);
+      }
+
       return assessment;
     } else {
       return null;
     }
   }
 
-  generateImprovementPlan(assessment: Assessment): {
-    [key: string]: string[];
-  } {
-    const plan: { [key: string]: string[] } = {
-      immediate: [],
-      shortTerm: [],
-      longTerm: [],
+  // Pipelines the batch: images compress on a CPU-sized queue while earlier ones are in flight
+  // on the network queue, so neither stage waits on the other. Results are yielded in input order.
+  // At most `networkConcurrency` + CPU-count areas are in progress at once, so compressed images
+  // never pile up ahead of a slower network stage.
+  async *assessAreas(
+    areas: Area[],
+    networkConcurrency = 8
+  ): AsyncGenerator<{ area: Area; assessment: Assessment | null }> {
+    const cpuCount = os.cpus().length;
+    const cpuQueue = new PQueue({ concurrency: cpuCount });
+    const networkQueue = new PQueue({ concurrency: networkConcurrency });
+    // Spans both stages: an area holds a slot from its hash check until Claude has answered
+    const inProgress = new PQueue({ concurrency: networkConcurrency + cpuCount });
+    let stopped = false;
+
+    const assess = async (area: Area): Promise<Assessment | null> => {
+      // Hashing decodes the full image, so it runs on the CPU queue, and a cache hit
+      // skips compression and Claude altogether
+      const { hash, cached } = await cpuQueue.add(() => this.lookupCachedAssessment(area));
+      if (cached || stopped) {
+        return cached;
+      }
+      const prepared = await cpuQueue.add(() => (stopped ? null : this.prepareImage(area.imagePath)));
+      return networkQueue.add(() => {
+        if (stopped) {
+          // The caller stopped reading results; don't send it, just clean up
+          if (prepared) {
+            this.removeTempFile(prepared.compressedImagePath);
+          }
+          return null;
+        }
+        return this.assessArea(area, prepared, hash);
+      });
     };
 
-    // Add safety hazards to immediate actions
-    for (const hazard of assessment.safetyHazards) {
-      plan.immediate.push(
-        `Address ${hazard.severity} safety hazard: ${hazard.description}`
-      );
-    }
+    const pending = areas.map((area) =>
+      inProgress.add(() => assess(area)).catch((error) => {
+        console.error(`Error assessing area '${area.name}': ${error}`);
+        return null;
+      })
+    );
 
-    // Add recommendations from assessment
-    for (const timeframe of ['immediate', 'shortTerm', 'longTerm']) {
-      if (timeframe in assessment.recommendations) {
-        plan[timeframe].push(...assessment.recommendations[timeframe]);
+    try {
+      for (let i = 0; i < areas.length; i++) {
+        yield { area: areas[i], assessment: await pending[i] };
       }
+    } finally {
+      // If the caller breaks out early, drop areas that haven't started. Started ones wind down:
+      // queued images are deleted unsent, and requests already in flight clean up when they finish.
+      stopped = true;
+      inProgress.clear();
+    }
+  }
+
+  generateImprovementPlan(assessment: Assessment): {
+    [key: string]: string[];
+  } {
+    const { immediate = [], shortTerm = [], longTerm = [] } = assessment.recommendations;
+    const hazards = assessment.safetyHazards;
+
+    // Safety hazards go first in immediate actions, followed by the immediate recommendations.
+    // Filled into a preallocated array in one pass rather than via push(...spread).
+    const immediatePlan: string[] = new Array(hazards.length + immediate.length);
+    let i = 0;
+    for (const hazard of hazards) {
+      immediatePlan[i++] = `Address ${hazard.severity} safety hazard: ${hazard.description}`;
+    }
+    for (const action of immediate) {
+      immediatePlan[i++] = action;
     }
 https://github.com/Aim67TQ7/_Blocks_TS/tree/main
-    return plan;
+    return {
+      immediate: immediatePlan,
+      shortTerm: shortTerm.slice(),
+      longTerm: longTerm.slice(),
+    };
   }
 
   async isValidImage(imagePath: string, maxSizeMb = 10): Promise<boolean> {
-    try {
-      if (!(await this.checkImageFile(imagePath))) {
-        return false;
-      }
-
-      // Use fs module to get file size in Node.js
-      const fs = require('fs');
-      const fileSizeMb = fs.statSync(imagePath).size / 1024 / 1024;
-      if (fileSizeMb > maxSizeMb) {
-        console.warn(
-          `Warning: Image file '${imagePath}' is too large (${fileSizeMb.toFixed(
-            2
-          )} MB). Maximum allowed size is ${maxSizeMb} MB.`
-        );
-        return false;
-      }
+    const { exists, sizeMb } = await this.checkImageFile(imagePath);
+    if (!exists) {
+      return false;
+    }
 
-      return true;
-    } catch (error) {
-      console.error(`Error checking image file: ${error}`);
+    if (sizeMb > maxSizeMb) {
+      console.warn(
+        `Warning: Image file '${imagePath}' is too large (${sizeMb.toFixed(
+          2
+        )} MB). Maximum allowed size is ${maxSizeMb} MB.`
+      );
       return false;
     }
+
+    return true;
   }
 }
@@ -1,20 +1,45 @@
 # This script integrates evaluation data, image processing, and API communication.
 # It sends data to an API, retrieves results, and supports adding a prompt for additional context.
 
-import requests
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import httpx
 import base64
+import json
+import mmap
 import os
 from io import BytesIO
-from PIL import Image
+from PIL import Image  # Install pillow-simd for SIMD-accelerated resize/JPEG encode (same API)
+
+# libjpeg-turbo encoder (PyTurboJPEG); falls back to PIL's JPEG encoder when unavailable
+try:
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _TURBO_JPEG = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _TURBO_JPEG = None
 
 # Maximum file size for validation (20MB)
 MAX_FILE_SIZE = 20 * 1024 * 1024
 
+# Largest width or height sent to the API
+MAX_DIMENSION = 1920
+
+# Worker processes for CPU-bound image compression (started lazily on first use)
+_COMPRESS_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+# Shared HTTP/2 client so every call in this module reuses (and multiplexes over) pooled connections
+_client = httpx.AsyncClient(http2=True, limits=httpx.Limits(max_connections=32))
+
 # Converts an image file to a Base64 string
+# The file is memory-mapped so its bytes are never copied into a Python object before encoding
 def convert_to_base64(file_path: str) -> str:
     try:
         with open(file_path, "rb") as file:
-            return base64.b64encode(file.read()).decode("utf-8")
+            if os.fstat(file.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.b64encode(mapped).decode("utf-8")
     except Exception as e:
         raise ValueError(f"Error converting file to Base64: {e}")
 
@@ -25,35 +50,58 @@ def validate_image_size(file_path: str) -> bool:
     except Exception as e:
         raise ValueError(f"Error validating file size: {e}")
 
-# Compresses an image and returns it as a Base64 string
+# Resizes an opened image to fit within 1920px and returns it as JPEG bytes
+def _compress_opened_image(image: Image.Image) -> bytes:
+    # Let libjpeg decode at a reduced scale, then downscale in place (no-op if already small).
+    # draft() needs the aspect-correct target size: with a square box it only kicks in once
+    # both sides are over 2x the limit, which skips most 4:3 photos.
+    scale = max(image.size) / MAX_DIMENSION
+    if scale > 1:
+        image.draft("RGB", (int(image.width / scale), int(image.height / scale)))
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    # Compress the image
+    if _TURBO_JPEG is not None and image.mode == "RGB":
+        return _TURBO_JPEG.encode(np.asarray(image), quality=80, pixel_format=TJPF_RGB)
+
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+# Checks whether an opened image can be sent as-is (JPEG, small dimensions and file size)
+def _fits_budget(image: Image.Image, file_size: int) -> bool:
+    return image.format == "JPEG" and max(image.size) <= MAX_DIMENSION and file_size <= MAX_FILE_SIZE
+
+# Compresses an image file straight from disk and returns the JPEG bytes
+def compress_image_from_path(file_path: str) -> bytes:
+    try:
+        with Image.open(file_path) as image:
+            # Only the header has been read so far; skip decode + re-encode if it already fits
+            if _fits_budget(image, os.path.getsize(file_path)):
+                with open(file_path, "rb") as file:
+                    return file.read()
+            return _compress_opened_image(image)
+    except Exception as e:
+        raise ValueError(f"Error compressing image: {e}")
+
+# Compresses an image file in a worker process so the event loop keeps servicing network I/O
+async def compress_image_from_path_async(file_path: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_COMPRESS_POOL, compress_image_from_path, file_path)
+
+# Compresses a Base64 image and returns it as a Base64 string
 def compress_image(base64_string: str) -> str:
     try:
         image_data = base64.b64decode(base64_string)
-        image = Image.open(BytesIO(image_data))
-
-        # Resize dimensions
-        max_dimension = 1920
-        width, height = image.size
-
-        if width > max_dimension or height > max_dimension:
-            if width > height:
-                height = int((height / width) * max_dimension)
-                width = max_dimension
-            else:
-                width = int((width / height) * max_dimension)
-                height = max_dimension
-
-        image = image.resize((width, height), Image.ANTIALIAS)
-
-        # Compress and encode the image
-        buffer = BytesIO()
-        image.save(buffer, format="JPEG", quality=80)
-        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+        with Image.open(BytesIO(image_data)) as image:
+            if _fits_budget(image, len(image_data)):
+                return base64_string
+            return base64.b64encode(_compress_opened_image(image)).decode("utf-8")
     except Exception as e:
         raise ValueError(f"Error compressing image: {e}")
 
 # Sends evaluation data to an API with an optional prompt
-def send_evaluation_to_api(scores: dict, area: str, prompt: str = "") -> dict:
+async def send_evaluation_to_api(scores: dict, area: str, prompt: str = "") -> dict:
     try:
         payload = {
             "area": area,
@@ -61,44 +109,63 @@ def send_evaluation_to_api(scores: dict, area: str, prompt: str = "") -> dict:
             "prompt": prompt  # Optional prompt for context
         }
 
-        response = requests.post("https://example.com/api/evaluations", json=payload)
+        response = await _client.post("https://example.com/api/evaluations", json=payload)
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise RuntimeError(f"Error sending evaluation to API: {e}")
 
 # Sends image data to an API for analysis
-def send_image_to_api(base64_image: str, prompt: str = "") -> dict:
+# The JPEG goes as a binary multipart file part, so no Base64 encoding is needed on either side
+async def send_image_to_api(image_bytes: bytes, prompt: str = "") -> dict:
     try:
-        payload = {
-            "image": base64_image,
+        files = {"image": ("image.jpg", image_bytes, "image/jpeg")}
+        data = {
             "prompt": prompt  # Optional prompt for context
         }
 
-        response = requests.post("https://example.com/api/images", json=payload)
+        response = await _client.post("https://example.com/api/images", files=files, data=data)
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise RuntimeError(f"Error sending image to API: {e}")
 
-# Sends both evaluation and image data to an API
-def send_evaluation_and_image_to_api(scores: dict, area: str, base64_image: str, prompt: str = "") -> dict:
+# Sends several images to the API in a single request
+# Each item is a dict with "image" (JPEG bytes) and any extra fields such as "prompt"
+async def send_images_to_api(items: list[dict]) -> list[dict]:
     try:
         payload = {
+            "items": [
+                {**item, "image": base64.b64encode(item["image"]).decode("utf-8")}
+                for item in items
+            ]
+        }
+
+        response = await _client.post("https://example.com/api/images/batch", json=payload)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        raise RuntimeError(f"Error sending images to API: {e}")
+
+# Sends both evaluation and image data to an API
+# The JPEG goes as a binary multipart file part; scores are sent as a JSON-encoded form field
+async def send_evaluation_and_image_to_api(scores: dict, area: str, image_bytes: bytes, prompt: str = "") -> dict:
+    try:
+        files = {"image": ("image.jpg", image_bytes, "image/jpeg")}
+        data = {
             "area": area,
-            "scores": scores,
-            "image": base64_image,
+            "scores": json.dumps(scores),
             "prompt": prompt  # Optional prompt for context
         }
 
-        response = requests.post("https://example.com/api/evaluation-image", json=payload)
+        response = await _client.post("https://example.com/api/evaluation-image", files=files, data=data)
         response.raise_for_status()
         return response.json()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         raise RuntimeError(f"Error sending evaluation and image to API: {e}")
 
 # Example usage
-if __name__ == "__main__":
+async def main():
     # Sample data
     sample_scores = {
         "sort": 8,
@@ -114,13 +181,19 @@ if __name__ == "__main__":
     # File path to the image
     image_path = "path/to/image.jpg"
 
-    if validate_image_size(image_path):
-        base64_image = convert_to_base64(image_path)
-        compressed_image = compress_image(base64_image)
+    try:
+        if validate_image_size(image_path):
+            compressed_image = await compress_image_from_path_async(image_path)
 
-        # Send evaluation and image data to the API
-        result = send_evaluation_and_image_to_api(sample_scores, area_name, compressed_image, prompt_text)
+            # Send evaluation and image data to the API
+            result = await send_evaluation_and_image_to_api(sample_scores, area_name, compressed_image, prompt_text)
 
-        print("API Response:", result)
-    else:
-        print("The image is too large to process.")
+            print("API Response:", result)
+        else:
+            print("The image is too large to process.")
+    finally:
+        await _client.aclose()
+        _COMPRESS_POOL.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -11,19 +11,38 @@
 #   Reduces the dimensions and quality of large images to save space and improve performance while maintaining acceptable quality.
 
 import base64
+import mmap
 from io import BytesIO
-from PIL import Image
+from PIL import Image  # Install pillow-simd for SIMD-accelerated resize/JPEG encode (same API)
 import os
 
+# Try to load the faster libjpeg-turbo encoder (PyTurboJPEG).
+# It's created once here so the library isn't loaded again for every picture.
+# If it's not installed, we just use PIL's normal JPEG encoder instead.
+try:
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _TURBO_JPEG = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _TURBO_JPEG = None
+
 # Set the maximum file size to 20MB (in bytes)
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB in bytes
 
+# Set the largest width or height a picture may have
+MAX_DIMENSION = 1920
+
 # This function converts a file into a Base64 string.
 # It's like turning the image into a long text message that computers can easily handle.
+# The file is memory-mapped, so we don't keep a second full copy of the picture in memory.
 def convert_to_base64(file_path: str) -> str:
     try:
         with open(file_path, "rb") as file:
-            base64_string = base64.b64encode(file.read()).decode("utf-8")
+            # An empty file can't be memory-mapped (and has nothing to encode)
+            if os.fstat(file.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                base64_string = base64.b64encode(mapped).decode("utf-8")
             return base64_string
     except Exception as e:
         raise ValueError(f"Error converting file to Base64: {e}")
@@ -37,34 +56,57 @@ def validate_image_size(file_path: str) -> bool:
     except Exception as e:
         raise ValueError(f"Error validating file size: {e}")
 
-# This function compresses a Base64 image to save space and improve performance.
+# This helper shrinks an image that's already open and gives back the JPEG bytes.
 # It resizes the image to ensure it's not too large (max 1920px) and reduces quality to 80%.
-def compress_image(base64_string: str) -> str:
-    try:
-        # Decode the Base64 string to an image
-        image_data = base64.b64decode(base64_string)
-        image = Image.open(BytesIO(image_data))
+def _compress_opened_image(image: Image.Image) -> bytes:
+    # Ask the JPEG decoder to skip pixels we'd throw away anyway (it can decode at 1/2, 1/4 or 1/8 size).
+    # We tell it the exact size we're aiming for (keeping the picture's shape),
+    # otherwise it only helps when both sides are more than twice too big.
+    scale = max(image.size) / MAX_DIMENSION
+    if scale > 1:
+        image.draft("RGB", (int(image.width / scale), int(image.height / scale)))
 
-        # Get the size of the image
-        width, height = image.size
-        max_dimension = 1920  # Maximum allowed width or height
+    # Shrink the image to fit within 1920px while keeping its shape (does nothing if it's already small)
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS, reducing_gap=2.0)
 
-        # Resize the image while maintaining its aspect ratio
-        if width > max_dimension or height > max_dimension:
-            if width > height:
-                height = int((height / width) * max_dimension)
-                width = max_dimension
-            else:
-                width = int((width / height) * max_dimension)
-                height = max_dimension
+    # Encode straight from the pixel array with libjpeg-turbo when we have it
+    if _TURBO_JPEG is not None and image.mode == "RGB":
+        return _TURBO_JPEG.encode(np.asarray(image), quality=80, pixel_format=TJPF_RGB)
 
-        # Resize the image
-        image = image.resize((width, height), Image.ANTIALIAS)
+    # Save the compressed image to a BytesIO buffer
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=80)  # Compress to 80% quality
+    return buffer.getvalue()
 
-        # Save the compressed image to a BytesIO buffer
-        buffer = BytesIO()
-        image.save(buffer, format="JPEG", quality=80)  # Compress to 80% quality
-        compressed_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+# This function checks if an opened picture can be sent just the way it is.
+# It must already be a JPEG, no bigger than 1920px, and under the file size limit.
+def _fits_budget(image: Image.Image, file_size: int) -> bool:
+    return image.format == "JPEG" and max(image.size) <= MAX_DIMENSION and file_size <= MAX_FILE_SIZE
+
+# This function compresses a picture file straight from disk and gives back the JPEG bytes.
+# No Base64 in the middle, so the picture is only decoded once.
+def compress_image_from_path(file_path: str) -> bytes:
+    try:
+        with Image.open(file_path) as image:
+            # Opening only reads the header, so checking the size here is cheap.
+            # If the picture is already small enough, hand back the file as-is.
+            if _fits_budget(image, os.path.getsize(file_path)):
+                with open(file_path, "rb") as file:
+                    return file.read()
+            return _compress_opened_image(image)
+    except Exception as e:
+        raise ValueError(f"Error compressing image: {e}")
+
+# This function compresses a Base64 image to save space and improve performance.
+def compress_image(base64_string: str) -> str:
+    try:
+        # Decode the Base64 string to an image
+        image_data = base64.b64decode(base64_string)
+        with Image.open(BytesIO(image_data)) as image:
+            # If the picture is already small enough, there's nothing to do
+            if _fits_budget(image, len(image_data)):
+                return base64_string
+            compressed_base64 = base64.b64encode(_compress_opened_image(image)).decode("utf-8")
 
         return compressed_base64
     except Exception as e:
@@ -75,8 +117,8 @@ def compress_image(base64_string: str) -> str:
 #    if validate_image_size("path/to/your/image.jpg"):
 #        print("Yay! The file is not too big!")
 #
-# 2. Then, convert the image into Base64:
-#    base64_picture = convert_to_base64("path/to/your/image.jpg")
+# 2. Then, compress the image straight from the file:
+#    smaller_picture = compress_image_from_path("path/to/your/image.jpg")
 #
-# 3. Finally, compress the image:
-#    smaller_picture = compress_image(base64_picture)
+# 3. Finally, turn the smaller picture into Base64 right before sending it:
+#    base64_picture = base64.b64encode(smaller_picture).decode("utf-8")
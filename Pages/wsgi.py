@@ -0,0 +1,25 @@
+# WSGI entry point for the 5S-AI landing page.
+#
+# Run it with a production server instead of Flask's single-threaded dev server, e.g.:
+#   gunicorn -w $(nproc) -k gthread --threads 4 -b 0.0.0.0:8000 wsgi:application
+# or with Uvicorn workers (needs asgiref):
+#   gunicorn -w $(nproc) -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 wsgi:asgi_application
+
+import importlib.util
+import os
+
+# The page's file name has a hyphen in it, so it can't be loaded with a normal import statement
+_spec = importlib.util.spec_from_file_location(
+    "landing_page_5s_ai", os.path.join(os.path.dirname(os.path.abspath(__file__)), "LandingPage_5S-AI.py")
+)
+_landing_page = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_landing_page)
+
+application = _landing_page.app
+
+# ASGI wrapper for Uvicorn workers
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    asgi_application = WsgiToAsgi(application)
+except ImportError:
+    asgi_application = None
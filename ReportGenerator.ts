@@ -40,13 +40,69 @@ interface Area {
     assessedBy?: string; // Name of the person who did the assessment
 }
 
+// The pieces of the text report that change from one assessment to the next.
+// Optional parts are either "" or start with their own newline.
+interface TextReportSections {
+    area: string;
+    date: string;
+    department: string;
+    assessedBy: string;
+    totalScore: number;
+    scores: string;
+    hazards: string;
+    positiveFindings: string;
+    areasOfConcern: string;
+    criticalHazards: string;
+    immediate: string;
+    shortTerm: string;
+    longTerm: string;
+}
+
+const RULE = "-".repeat(40);
+
+// The whole text report as one template, filled in with the computed sections
+const textReportTemplate = (s: TextReportSections): string => `5S and Hazard Assessment Report
+==============================
+
+Area: ${s.area}
+Date: ${s.date}${s.department}${s.assessedBy}
+
+Total Score: ${s.totalScore}/100
+
+5S Components (60 points):
+${RULE}${s.scores}
+
+Hazard Components (40 points):
+${RULE}${s.hazards}${s.positiveFindings}${s.areasOfConcern}${s.criticalHazards}
+
+Recommended Actions:
+${RULE}${s.immediate}${s.shortTerm}${s.longTerm}`;
+
+// Put each line on its own new line, so it can be dropped straight into the template
+const asLines = (lines: string[]): string => lines.map(line => `\n${line}`).join("");
+
+// The JSON export ({ area, assessment }) one piece at a time, so the whole
+// document never has to be built as a single string before it is written
+function* jsonChunks(area: Area, assessment: Assessment): Generator<string> {
+    yield `{"area":${JSON.stringify(area)},"assessment":{`;
+    let first = true;
+    for (const [key, value] of Object.entries(assessment)) {
+        if (value === undefined) continue; // JSON.stringify leaves these out too
+        yield `${first ? "" : ","}${JSON.stringify(key)}:${JSON.stringify(value)}`;
+        first = false;
+    }
+    yield "}}";
+}
+
 class ReportGenerator {
+    private static ensuredDirs = new Set<string>(); // Folders already created by any instance
     private outputDir: string; // Folder to save the reports
 
     constructor(outputDir = "data/reports") {
         this.outputDir = path.resolve(outputDir);
-        if (!fs.existsSync(this.outputDir)) {
+        if (!ReportGenerator.ensuredDirs.has(this.outputDir)) {
             fs.mkdirSync(this.outputDir, { recursive: true }); // Create the folder if it doesn't exist
+            ReportGenerator.ensuredDirs.add(this.outputDir);
         }
     }
 
@@ -55,164 +111,133 @@ class ReportGenerator {
         return format(new Date(), 'yyyyMMdd_HHmmss');
     }
 
-    // Create a text report
-    public createTextReport(assessment: Assessment, area: Area): string {
-        const timestamp = this.getTimestamp();
-        const filename = path.join(this.outputDir, `5S_Assessment_${area.name}_${timestamp}.txt`);
-
-        const lines: string[] = [];
-
-        // Add header information
-        lines.push("5S and Hazard Assessment Report");
-        lines.push("==============================\n");
-        lines.push(`Area: ${area.name}`);
-        lines.push(`Date: ${assessment.timestamp}`);
-
-        if (area.department) lines.push(`Department: ${area.department}`);
-        if (area.assessedBy) lines.push(`Assessed By: ${area.assessedBy}`);
-
-        lines.push(`\nTotal Score: ${assessment.totalScore}/100`);
-
-        // Add 5S Components
-        lines.push("\n5S Components (60 points):");
-        lines.push("-".repeat(40));
-        for (const [category, data] of Object.entries(assessment.scores["5s"])) {
-            lines.push(`${category.charAt(0).toUpperCase() + category.slice(1)}: ${data.score}/12 points`);
-            lines.push(`Observations: ${data.observations}\n`);
-        }
-
-        // Add Hazard Components
-        lines.push("\nHazard Components (40 points):");
-        lines.push("-".repeat(40));
-        for (const [category, data] of Object.entries(assessment.scores.hazard)) {
-            lines.push(`${category.replace('_', ' ')}: ${data.score}/10 points`);
-            lines.push(`Observations: ${data.observations}\n`);
-        }
-
-        // Positive Findings
-        if (assessment.positiveFindings?.length) {
-            lines.push("\nPositive Findings:");
-            lines.push("-".repeat(40));
-            assessment.positiveFindings.forEach(finding => lines.push(`• ${finding}`));
-        }
-
-        // Areas of Concern
-        if (assessment.areasOfConcern?.length) {
-            lines.push("\nAreas of Concern:");
-            lines.push("-".repeat(40));
-            assessment.areasOfConcern.forEach(concern => lines.push(`• ${concern}`));
-        }
+    // Build the path for a report file of the given type
+    private reportPath(area: Area, extension: string, timestamp: string): string {
+        return path.join(this.outputDir, `5S_Assessment_${area.name}_${timestamp}.${extension}`);
+    }
 
-        // Critical Hazards
-        if (assessment.criticalHazards?.length) {
-            lines.push("\nCRITICAL HAZARDS:");
-            lines.push("-".repeat(40));
-            assessment.criticalHazards.forEach(hazard => lines.push(`! ${hazard}`));
-        }
+    // Create a text report
+    public createTextReport(assessment: Assessment, area: Area, timestamp = this.getTimestamp()): string {
+        const filename = this.reportPath(area, "txt", timestamp);
+        fs.writeFileSync(filename, this.renderTextReport(assessment, area));
+        return filename;
+    }
 
-        // Recommendations
-        lines.push("\nRecommended Actions:");
-        lines.push("-".repeat(40));
+    // Build the text report contents
+    private renderTextReport(assessment: Assessment, area: Area): string {
+        const { recommendations } = assessment;
+
+        // A titled list of items, or nothing at all when there are no items
+        const section = (title: string, items: string[] | undefined, bullet: string, withRule = true): string =>
+            items?.length ? asLines([title, ...(withRule ? [RULE] : []), ...items.map(item => `${bullet} ${item}`)]) : "";
+
+        return textReportTemplate({
+            area: area.name,
+            date: assessment.timestamp,
+            department: area.department ? `\nDepartment: ${area.department}` : "",
+            assessedBy: area.assessedBy ? `\nAssessed By: ${area.assessedBy}` : "",
+            totalScore: assessment.totalScore,
+            scores: asLines(Object.entries(assessment.scores["5s"]).map(([category, data]) =>
+                `${category.charAt(0).toUpperCase() + category.slice(1)}: ${data.score}/12 points\nObservations: ${data.observations}\n`
+            )),
+            hazards: asLines(Object.entries(assessment.scores.hazard).map(([category, data]) =>
+                `${category.replace('_', ' ')}: ${data.score}/10 points\nObservations: ${data.observations}\n`
+            )),
+            positiveFindings: section("\nPositive Findings:", assessment.positiveFindings, "•"),
+            areasOfConcern: section("\nAreas of Concern:", assessment.areasOfConcern, "•"),
+            criticalHazards: section("\nCRITICAL HAZARDS:", assessment.criticalHazards, "!"),
+            immediate: section("\nImmediate Actions (24-48 hours):", recommendations.immediate, "•", false),
+            shortTerm: section("\nShort-term Improvements (1-2 weeks):", recommendations.shortTerm, "•", false),
+            longTerm: section("\nLong-term Initiatives (1-3 months):", recommendations.longTerm, "•", false),
+        });
+    }
 
-        if (assessment.recommendations.immediate?.length) {
-            lines.push("\nImmediate Actions (24-48 hours):");
-            assessment.recommendations.immediate.forEach(action => lines.push(`• ${action}`));
-        }
+    // Create an Excel report
+    public createExcelReport(assessment: Assessment, area: Area, timestamp = this.getTimestamp()): string {
+        const filename = this.reportPath(area, "xlsx", timestamp);
+        XLSX.writeFile(this.buildWorkbook(assessment), filename, { bookSST: false });
+        return filename;
+    }
 
-        if (assessment.recommendations.shortTerm?.length) {
-            lines.push("\nShort-term Improvements (1-2 weeks):");
-            assessment.recommendations.shortTerm.forEach(action => lines.push(`• ${action}`));
+    // Build the Excel workbook (scores, findings and recommendations sheets)
+    private buildWorkbook(assessment: Assessment): XLSX.WorkBook {
+        // Prepare scores data as rows of cells (header first) in one preallocated array,
+        // rather than an intermediate object per row
+        const fiveSEntries = Object.entries(assessment.scores["5s"]);
+        const hazardEntries = Object.entries(assessment.scores.hazard);
+        const scoresRows: (string | number)[][] = new Array(fiveSEntries.length + hazardEntries.length + 1);
+        scoresRows[0] = ["Component", "Category", "Score", "MaxScore", "Observations"];
+        let row = 1;
+        for (const [category, data] of fiveSEntries) {
+            scoresRows[row++] = ["5S", category, data.score, 12, data.observations];
         }
-
-        if (assessment.recommendations.longTerm?.length) {
-            lines.push("\nLong-term Initiatives (1-3 months):");
-            assessment.recommendations.longTerm.forEach(action => lines.push(`• ${action}`));
+        for (const [category, data] of hazardEntries) {
+            scoresRows[row++] = ["Hazard", category, data.score, 10, data.observations];
         }
 
-        fs.writeFileSync(filename, lines.join('\n'));
-        return filename;
-    }
-
-    // Create an Excel report
-    public createExcelReport(assessment: Assessment, area: Area): string {
-        const timestamp = this.getTimestamp();
-        const filename = path.join(this.outputDir, `5S_Assessment_${area.name}_${timestamp}.xlsx`);
-
-        // Prepare scores data
-        const scoresData = [
-            ...Object.entries(assessment.scores["5s"]).map(([category, data]) => ({
-                Component: "5S",
-                Category: category,
-                Score: data.score,
-                MaxScore: 12,
-                Observations: data.observations,
-            })),
-            ...Object.entries(assessment.scores.hazard).map(([category, data]) => ({
-                Component: "Hazard",
-                Category: category,
-                Score: data.score,
-                MaxScore: 10,
-                Observations: data.observations,
-            })),
+        // Prepare findings and recommendations as rows, one per category / action
+        const findingsRows: string[][] = [
+            ["Category", "Items"],
+            ["Positive Findings", assessment.positiveFindings?.join("\n") || ""],
+            ["Areas of Concern", assessment.areasOfConcern?.join("\n") || ""],
+            ["Critical Hazards", assessment.criticalHazards?.join("\n") || ""],
         ];
 
-        // Prepare findings and recommendations
-        const findings = {
-            Category: ["Positive Findings", "Areas of Concern", "Critical Hazards"],
-            Items: [
-                assessment.positiveFindings?.join("\n") || "",
-                assessment.areasOfConcern?.join("\n") || "",
-                assessment.criticalHazards?.join("\n") || "",
-            ],
-        };
-
-        const recommendations = {
-            Timeframe: [],
-            Actions: [],
-        };
-
-        ["immediate", "shortTerm", "longTerm"].forEach(key => {
-            const actions = assessment.recommendations[key as keyof Assessment["recommendations"]];
-            if (actions) {
-                recommendations.Timeframe.push(...Array(actions.length).fill(key));
-                recommendations.Actions.push(...actions);
+        const recommendationsRows: string[][] = [["Timeframe", "Actions"]];
+        for (const key of ["immediate", "shortTerm", "longTerm"] as const) {
+            for (const action of assessment.recommendations[key] ?? []) {
+                recommendationsRows.push([key, action]);
             }
-        });
+        }
 
+        // Dense sheets store cells in row arrays instead of an "A1"-keyed object,
+        // which uses much less memory and writes faster
         const workbook = XLSX.utils.book_new();
-        const scoresSheet = XLSX.utils.json_to_sheet(scoresData);
-        const findingsSheet = XLSX.utils.json_to_sheet(findings);
-        const recommendationsSheet = XLSX.utils.json_to_sheet(recommendations);
+        const scoresSheet = XLSX.utils.aoa_to_sheet(scoresRows, { dense: true });
+        const findingsSheet = XLSX.utils.aoa_to_sheet(findingsRows, { dense: true });
+        const recommendationsSheet = XLSX.utils.aoa_to_sheet(recommendationsRows, { dense: true });
 
         XLSX.utils.book_append_sheet(workbook, scoresSheet, "Scores");
         XLSX.utils.book_append_sheet(workbook, findingsSheet, "Findings");
         XLSX.utils.book_append_sheet(workbook, recommendationsSheet, "Recommendations");
 
-        XLSX.writeFile(workbook, filename);
-        return filename;
+        return workbook;
     }
 
     // Save the assessment data in JSON format
-    public saveJsonData(assessment: Assessment, area: Area): string {
-        const timestamp = this.getTimestamp();
-        const filename = path.join(this.outputDir, `5S_Assessment_${area.name}_${timestamp}.json`);
-
-        const data = {
-            area,
-            assessment,
-        };
-
-        fs.writeFileSync(filename, JSON.stringify(data, null, 4));
+    public saveJsonData(assessment: Assessment, area: Area, timestamp = this.getTimestamp()): string {
+        const filename = this.reportPath(area, "json", timestamp);
+
+        // Compact output: this file is read by other programs, not people
+        const fd = fs.openSync(filename, "w");
+        try {
+            for (const chunk of jsonChunks(area, assessment)) {
+                fs.writeSync(fd, chunk);
+            }
+        } finally {
+            fs.closeSync(fd);
+        }
         return filename;
     }
 
     // Generate all report formats (text, Excel, JSON)
-    public batchExport(assessment: Assessment, area: Area): Record<string, string> {
-        return {
-            text: this.createTextReport(assessment, area),
-            excel: this.createExcelReport(assessment, area),
-            json: this.saveJsonData(assessment, area),
-        };
+    public async batchExport(assessment: Assessment, area: Area): Promise<Record<string, string>> {
+        // One timestamp for the whole batch so the three files match
+        const timestamp = this.getTimestamp();
+        const text = this.reportPath(area, "txt", timestamp);
+        const excel = this.reportPath(area, "xlsx", timestamp);
+        const json = this.reportPath(area, "json", timestamp);
+
+        // Build all three reports first, then write the files at the same time
+        // so the disk writes overlap instead of running one after another
+        const workbook = XLSX.write(this.buildWorkbook(assessment), { type: "buffer", bookType: "xlsx", bookSST: false });
+        await Promise.all([
+            fs.promises.writeFile(text, this.renderTextReport(assessment, area)),
+            fs.promises.writeFile(excel, workbook),
+            fs.promises.writeFile(json, jsonChunks(area, assessment)),
+        ]);
+
+        return { text, excel, json };
     }
 }
 
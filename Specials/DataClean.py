@@ -1,56 +1,65 @@
 import pandas as pd
 import re
+from functools import lru_cache
+
+# Matches any non-digit character (compiled once, used for phone numbers)
+NON_DIGIT = re.compile(r'\D')
+
+# Matches anything that isn't part of a number (compiled once, used for currency values)
+NON_NUMERIC = re.compile(r'[^\d.-]')
+
+# What float() accepts once NON_NUMERIC has been stripped (used for whole currency columns)
+PLAIN_NUMBER = re.compile(r'-?(\d+\.?\d*|\.\d+)')
+
+# Standardize column names (keys are lowercase for case-insensitive matching)
+COLUMN_MAPPING = {
+    'lat': 'Latitude',
+    'latitude': 'Latitude',
+    'lon': 'Longitude',
+    'longitude': 'Longitude',
+    'phone': 'Phone',
+    'territory': 'Territory',
+    'sales_rep': 'Sales Rep',
+    'prodcode': 'ProdCode',
+    'state': 'State/Prov',
+    'state/prov': 'State/Prov',
+    'stateprov': 'State/Prov',
+    'state/province': 'State/Prov',
+    'name': 'Name',
+    'company name': 'Name',
+    'customer name': 'Name',
+    '3-year spend': '3-year Spend',
+    '3 year spend': '3-year Spend',
+    'three year spend': '3-year Spend'
+}
+
+@lru_cache(maxsize=256)
+def build_rename_map(columns):
+    """Map each known column name (given as a tuple) to its standard name, cached per header layout."""
+    return {col: COLUMN_MAPPING[col.lower()] for col in columns if col.lower() in COLUMN_MAPPING}
 
 def clean_data(df):
     """Clean and prepare the customer data."""
-    # Standardize column names
-    column_mapping = {
-        'lat': 'Latitude',
-        'latitude': 'Latitude',
-        'lon': 'Longitude',
-        'longitude': 'Longitude',
-        'phone': 'Phone',
-        'territory': 'Territory',
-        'sales_rep': 'Sales Rep',
-        'prodcode': 'ProdCode',
-        'state': 'State/Prov',
-        'state/prov': 'State/Prov',
-        'stateprov': 'State/Prov',
-        'state/province': 'State/Prov',
-        'name': 'Name',
-        'company name': 'Name',
-        'customer name': 'Name',
-        '3-year spend': '3-year Spend',
-        '3 year spend': '3-year Spend',
-        'three year spend': '3-year Spend'
-    }
+    # Rename columns if they exist (case-insensitive), all in one rename
+    df = df.rename(columns=build_rename_map(tuple(df.columns)))
     
-    # Rename columns if they exist (case-insensitive)
-    for col in df.columns:
-        lower_col = col.lower()  # Convert column name to lowercase for case-insensitive matching
-        for old_col, new_col in column_mapping.items():
-            if lower_col == old_col:  # If column matches a key in the mapping, rename it
-                df = df.rename(columns={col: new_col})
+    # Convert coordinates to numbers (anything missing or invalid becomes NaN)
+    lat = pd.to_numeric(df['Latitude'], errors='coerce')
+    lon = pd.to_numeric(df['Longitude'], errors='coerce')
     
-    # Remove rows with invalid coordinates
-    df = df[df['Latitude'].notna() & df['Longitude'].notna()]
-    
-    # Convert coordinates to float
-    df['Latitude'] = pd.to_numeric(df['Latitude'], errors='coerce')  # Convert latitude to numeric
-    df['Longitude'] = pd.to_numeric(df['Longitude'], errors='coerce')  # Convert longitude to numeric
-    
-    # Remove any rows where conversion to float failed
-    df = df.dropna(subset=['Latitude', 'Longitude'])  # Drop rows with NaN values in coordinates
+    # Keep only rows where both coordinates are valid, in a single pass
+    valid = lat.notna() & lon.notna()
+    df = df.loc[valid].assign(Latitude=lat[valid], Longitude=lon[valid])
     
     # Clean phone numbers if Phone column exists
     if 'Phone' in df.columns:
-        df['Phone'] = df['Phone'].astype(str).apply(clean_phone_number)  # Apply phone number cleaning
+        df['Phone'] = clean_phone_numbers(df['Phone'])  # Clean the whole column at once
     
     # Ensure required columns exist
     required_columns = ['Territory', 'Sales Rep', 'State/Prov', 'ProdCode']  # List of required columns
-    for col in required_columns:
-        if col not in df.columns:  # If a required column is missing, add it with empty values
-            df[col] = ''
+    missing = [col for col in required_columns if col not in df.columns]
+    if missing:  # Add all missing required columns at once, with empty values
+        df = df.assign(**{col: '' for col in missing})
     
     return df  # Return the cleaned DataFrame
 
@@ -60,29 +69,62 @@ def clean_phone_number(phone):
         return ''
     
     # Remove non-numeric characters
-    nums = re.sub(r'\D', '', str(phone))  # Keep only digits
+    nums = NON_DIGIT.sub('', str(phone))  # Keep only digits
     
     # Format number if it has enough digits
     if len(nums) >= 10:  # Ensure phone number has at least 10 digits
         return f"({nums[-10:-7]}) {nums[-7:-4]}-{nums[-4:]}"  # Format as (XXX) XXX-XXXX
     return phone  # Return original if formatting is not possible
 
-def format_currency(value):
-    """Format currency values consistently."""
-    if pd.isna(value) or value == ' $-   ' or value == '0':  # Handle invalid or missing values
-        return '$0'
-        
-    # Remove any existing formatting
-    value_str = str(value)  # Convert value to string
-    value_str = re.sub(r'[^\d.-]', '', value_str.strip())  # Remove non-numeric characters
+def clean_phone_numbers(phones):
+    """Clean and format a whole column of phone numbers (same rules as clean_phone_number)."""
+    phones = phones.astype(str)
+    nums = phones.str.replace(NON_DIGIT, '', regex=True)  # Keep only digits
+    
+    # Format numbers with enough digits as (XXX) XXX-XXXX, keep the rest as they were
+    formatted = '(' + nums.str[-10:-7] + ') ' + nums.str[-7:-4] + '-' + nums.str[-4:]
+    cleaned = formatted.where(nums.str.len() >= 10, phones)
     
-    # Handle empty or invalid strings
-    if not value_str:  # If value is empty, return 0.0
+    # Blank out invalid or missing phone numbers
+    return cleaned.mask(phones.isna() | phones.isin(['0', 'nan']), '')
+
+@lru_cache(maxsize=4096, typed=True)  # typed, so True isn't served the cached result for 1
+def currency_to_float(value):
+    """Convert a currency value to a number (0.0 for missing or invalid values)."""
+    if pd.isna(value):  # Handle missing values
         return 0.0
-        
+    
+    # Numbers are already clean, so use them straight away
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    
+    # Remove any existing formatting
+    value_str = NON_NUMERIC.sub('', str(value).strip())  # Remove non-numeric characters
+    
     try:
-        # Convert to float and format
-        amount = float(value_str)  # Convert to float
-        return f"${amount:,.2f}"  # Format as currency with commas and two decimal places
+        return float(value_str)  # Convert to float
     except ValueError:
-        return '$0'  # Return default value if conversion fails
+        return 0.0  # Empty or invalid strings (e.g. ' $-   ') count as zero
+
+@lru_cache(maxsize=4096)
+def float_to_currency_str(amount):
+    """Format a number as currency with commas and two decimal places."""
+    return f"${amount:,.2f}"
+
+def format_currency(value):
+    """Format currency values consistently (always returns a string like '$1,234.50')."""
+    return float_to_currency_str(currency_to_float(value))
+
+def format_currencies(values):
+    """Format a whole column of currency values (same rules as format_currency)."""
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        amounts = values.astype(float)  # All numbers already, nothing to strip
+    else:
+        # Numbers are used as they are; everything else is stripped of formatting first
+        is_number = values.map(lambda value: isinstance(value, (int, float)) and not isinstance(value, bool))
+        numbers = pd.to_numeric(values.where(is_number), errors='coerce')
+        stripped = values.where(~is_number, '').astype(str).str.strip().str.replace(NON_NUMERIC, '', regex=True)
+        strings = stripped.where(stripped.str.fullmatch(PLAIN_NUMBER)).astype(float)  # Invalid strings become NaN
+        amounts = numbers.where(is_number, strings)
+    
+    return amounts.fillna(0.0).astype(float).map(float_to_currency_str)
@@ -1,10 +1,11 @@
 import streamlit as st; // Importing Streamlit to create the web app
 import * as pd from 'pandas'; // Importing Pandas library for data manipulation
 import { processDocuments, getFileSize } from './documentProcessor'; // Importing custom functions for processing documents
-import { registerCompany, verifyLicense, storeVector } from './database'; // Importing database functions for user and data handling
-import * as os from 'os'; // Importing OS module for handling file paths
+import { registerCompany, verifyLicense, storeVectorsBulk } from './database'; // Importing database functions for user and data handling
 import * as np from 'numpy'; // Importing Numpy for numerical computations
-import * as tempfile from 'tempfile'; // Importing Tempfile to handle temporary files
+import { ThreadPoolExecutor } from 'concurrent.futures'; // Importing a thread pool to process documents in the background
+import * as time from 'time'; // Importing Time to pause between progress updates
+import * as io from 'io'; // Importing IO to build the NPY download in memory
 
 st.setPageConfig({ // Setting up the app's configuration
     page_title: "Document Vectorizer", // Title of the app
@@ -12,6 +13,14 @@ st.setPageConfig({ // Setting up the app's configuration
     layout: "wide" // Setting the layout to wide
 });
 
+// Cache lookups that don't change between reruns (every widget click reruns the script).
+// Only read-only calls are cached; registerCompany and storeVectorsBulk change the database.
+const cachedFileSize = st.cacheData(getFileSize, { ttl: 5, showSpinner: false }); // NPY size, rechecked at most every 5 seconds
+const cachedVerifyLicense = st.cacheData(verifyLicense, { ttl: 60 }); // License status per license number, kept for a minute
+
+// Created once per server process; Streamlit reruns this script on every interaction
+const getProcessingExecutor = st.cacheResource(() => new ThreadPoolExecutor({ maxWorkers: 2 })); // Background threads for document processing
+
 function formatSize(sizeBytes: number): string { // Function to format file sizes into readable units
     const units = ['B', 'KB', 'MB', 'GB']; // Units of measurement for file sizes
     let size = sizeBytes; // Starting size in bytes
@@ -100,7 +109,7 @@ function main() { // Main function that runs the app
         const form = st.form("licenseForm"); // Create a license form
         const licenseNumber = form.textInput("Enter License Number"); // Input field for license number
         if (form.formSubmitButton("Activate License")) { // If license form is submitted
-            if (verifyLicense(licenseNumber)) { // Verify the license number
+            if (cachedVerifyLicense(licenseNumber)) { // Verify the license number
                 st.sessionState['licenseActivated'] = true; // Mark license as activated
                 st.sessionState['companyLicense'] = licenseNumber; // Store the license number
                 st.success("License activated successfully!"); // Show success message
@@ -139,7 +148,7 @@ function main() { // Main function that runs the app
 
     // File size monitoring
     const [col1, col2] = st.columns(2); // Create two columns for displaying file size info
-    const currentSize = getFileSize(); // Get the current file size
+    const currentSize = cachedFileSize(); // Get the current file size
     const maxSize = 20 * 1024 * 1024; // 20MB as the maximum file size
     const progress = Math.min((currentSize / maxSize) * 100, 100); // Calculate progress percentage
 
@@ -161,34 +170,41 @@ function main() { // Main function that runs the app
             const statusText = st.empty(); // Create an empty text placeholder
 
             try {
-                tempfile.withTemporaryDirectory(tempDir => { // Create a temporary directory
-                    const tempFiles = uploadedFiles.map(file => { // Loop through uploaded files
-                        const tempPath = `${tempDir}/${file.name}`; // Create a temp file path
-                        os.writeFileSync(tempPath, file.read()); // Save file to temp path
-                        return tempPath; // Return temp file path
-                    });
-
-                    const vectorsDf = processDocuments(tempFiles, { // Process the documents
-                        progressCallback: x => progressBar.progress(x), // Update progress bar
-                        statusCallback: x => statusText.write(x) // Update status text
-                    });
-
-                    vectorsDf.forEach(row => { // Loop through each processed row
-                        const vector = Object.values(row).slice(1); // Extract vector data
-                        const metadata = { // Create metadata
-                            uploaded_by: st.sessionState['companyLicense'], // Add license info
-                            filename: row.filename // Add file name
-                        };
-                        storeVector(row.filename, vector, metadata, st.sessionState['companyLicense']); // Store vector in database
-                    });
-
-                    col1.downloadButton("Download CSV", vectorsDf.toCsv(), "document_vectors.csv"); // Button to download CSV file
-
-                    col2.downloadButton("Download NPY", np.save("vectors.npy", vectorsDf), "vectors.npy"); // Button to download NPY file
-
-                    st.subheader("Preview of vectorized data:"); // Display subheader for preview
-                    st.dataframe(vectorsDf.head()); // Show a preview of the data
+                // Process the uploads straight from memory, without saving them to disk first
+                const documents = uploadedFiles.map(file => [file.name, file.getbuffer()]); // (name, bytes) for each uploaded file
+
+                // Process the documents on a background thread; it can't draw on the page itself,
+                // so it only records its progress and this script redraws it every 100ms
+                const latest = { progress: 0, status: "" }; // Most recent progress reported by the worker
+                const processing = getProcessingExecutor().submit(processDocuments, documents, { // Process the documents
+                    progressCallback: x => { latest.progress = x; }, // Record progress
+                    statusCallback: x => { latest.status = x; } // Record status text
                 });
+                while (!processing.done()) { // Until processing finishes
+                    time.sleep(0.1); // Wait a moment
+                    progressBar.progress(latest.progress); // Update progress bar
+                    statusText.write(latest.status); // Update status text
+                }
+                const vectorsDf = processing.result(); // Get the processed vectors (re-raises any processing error)
+
+                const records = vectorsDf.map(row => ({ // Build one record per processed row
+                    filename: row.filename, // File name
+                    vector: Object.values(row).slice(1), // Extract vector data
+                    metadata: { // Create metadata
+                        uploaded_by: st.sessionState['companyLicense'], // Add license info
+                        filename: row.filename // Add file name
+                    }
+                }));
+                storeVectorsBulk(records, st.sessionState['companyLicense']); // Store all vectors in the database in one insert
+
+                col1.downloadButton("Download CSV", vectorsDf.toCsv(), "document_vectors.csv"); // Button to download CSV file
+
+                const npyBuffer = new io.BytesIO(); // Build the NPY file in memory instead of writing it to disk
+                np.save(npyBuffer, vectorsDf.drop({ columns: ["filename"] }).toNumpy({ dtype: np.float16 })); // Vectors only, as float16 (half the size)
+                col2.downloadButton("Download NPY", npyBuffer.getvalue(), "vectors.npy"); // Button to download NPY file
+
+                st.subheader("Preview of vectorized data:"); // Display subheader for preview
+                st.dataframe(vectorsDf.head()); // Show a preview of the data
             } catch (e) {
                 st.error(`An error occurred during processing: ${e}`); // Show error message
             } finally {
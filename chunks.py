@@ -2,6 +2,12 @@
 # 1. It splits a long piece of text into smaller chunks, making it easier to read or process.
 # 2. It finds useful details about the text, like the title (first line), word count, and estimated reading time.
 
+import re
+from datetime import datetime, timezone
+
+# A sentence is any run of text ending in one or more of . ! ?
+SENTENCE_PATTERN = re.compile(r'[^.!?]+[.!?]+')
+
 def chunk_text(text: str, max_chunk_size: int = 1000) -> list[str]:
     """
     Splits the input text into smaller chunks based on sentence boundaries.
@@ -10,23 +16,22 @@ def chunk_text(text: str, max_chunk_size: int = 1000) -> list[str]:
     :param max_chunk_size: Maximum size of each chunk.
     :return: A list of text chunks.
     """
-    import re
-
-    # Split text into sentences
-    sentences = re.findall(r'[^.!?]+[.!?]+', text) or [text]
+    # Walk the sentences, tracking only where the current chunk starts and ends,
+    # and slice each finished chunk straight out of the original text
     chunks = []
-    current_chunk = ''
+    chunk_start = chunk_end = 0
 
-    for sentence in sentences:
+    for sentence in SENTENCE_PATTERN.finditer(text):
         # If adding this sentence exceeds max_chunk_size, start a new chunk
-        if len(current_chunk) + len(sentence) > max_chunk_size and current_chunk:
-            chunks.append(current_chunk.strip())
-            current_chunk = ''
-        current_chunk += sentence + ' '
+        if sentence.end() - chunk_start > max_chunk_size and chunk_end > chunk_start:
+            chunks.append(text[chunk_start:chunk_end].strip())
+            chunk_start = chunk_end
+        chunk_end = sentence.end()
 
-    # Add the last chunk if not empty
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    # Add the last chunk (including any text after the final sentence) if not empty
+    last_chunk = text[chunk_start:].strip()
+    if last_chunk:
+        chunks.append(last_chunk)
 
     return chunks
 
@@ -37,17 +42,15 @@ def extract_metadata(text: str) -> dict:
     :param text: The input text.
     :return: A dictionary containing metadata: title, word count, estimated reading time, and processing timestamp.
     """
-    import math
-    from datetime import datetime
-
     # Extract metadata
-    first_line = text.split('\n')[0]
-    word_count = len(text.split())
-    estimated_reading_time = math.ceil(word_count / 200)  # Assuming 200 words per minute
+    first_line_end = text.find('\n')
+    first_line = text if first_line_end == -1 else text[:first_line_end]
+    word_count = len(text.split())  # str.split runs in C, faster than counting regex matches
+    estimated_reading_time = -(-word_count // 200)  # Assuming 200 words per minute (rounded up)
 
     return {
         "title": first_line,
         "word_count": word_count,
         "estimated_reading_time": estimated_reading_time,
-        "processed_at": datetime.utcnow().isoformat(),
+        "processed_at": datetime.now(timezone.utc).isoformat(),
     }
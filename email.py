@@ -1,7 +1,7 @@
+import asyncio
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import os
+from string import Template
 
 # Validate environment variables
 EMAIL_USER = os.getenv("EMAIL_USER")
@@ -11,9 +11,35 @@ APP_URL = os.getenv("APP_URL")
 if not EMAIL_USER or not EMAIL_PASSWORD or not APP_URL:
     raise ValueError("Missing necessary environment variables for email configuration")
 
-def send_password_reset_email(email: str, reset_token: str):
+# Most SMTP connections a batch send opens at once (Gmail limits concurrent connections)
+MAX_CONCURRENT_SENDS = 5
+
+# The parts of the email that are the same for every recipient
+SUBJECT = "Password Reset Request"
+HTML_TEMPLATE = (
+    "<h1>Password Reset Request</h1>"
+    "<p>Click the link below to reset your password:</p>"
+    '<a href="$reset_url">Reset Password</a>'
+    "<p>If you didn't request this, please ignore this email.</p>"
+)
+
+# The raw email (headers + HTML body), so each send only fills in the recipient and link
+MESSAGE_TEMPLATE = Template(
+    f"From: {EMAIL_USER.replace('$', '$$')}\r\n"
+    "To: $email\r\n"
+    f"Subject: {SUBJECT}\r\n"
+    "MIME-Version: 1.0\r\n"
+    "Content-Type: text/html; charset=utf-8\r\n"
+    "\r\n"
+    f"{HTML_TEMPLATE}\r\n"
+)
+
+# Everything in the reset link except the token
+RESET_URL_PREFIX = f"{APP_URL}/reset-password?token="
+
+def build_message(email: str, reset_token: str) -> bytes:
     """
-    Sends a password reset email to the specified recipient.
+    Builds the raw password reset email for a single recipient.
     
     Args:
         email (str): Recipient's email address.
@@ -21,34 +47,119 @@ def send_password_reset_email(email: str, reset_token: str):
     """
     if not email or not reset_token:
         raise ValueError("Email and reset token are required")
+    if "\r" in email or "\n" in email:
+        raise ValueError("Invalid email address")  # Would let the address add its own headers
 
     # Create the password reset URL
-    reset_url = f"{APP_URL}/reset-password?token={reset_token}"
+    reset_url = RESET_URL_PREFIX + reset_token
 
-    # Create the email content
-    subject = "Password Reset Request"
-    html_content = f"""
-    <h1>Password Reset Request</h1>
-    <p>Click the link below to reset your password:</p>
-    <a href="{reset_url}">Reset Password</a>
-    <p>If you didn't request this, please ignore this email.</p>
+    return MESSAGE_TEMPLATE.substitute(email=email, reset_url=reset_url).encode("utf-8")
+
+class SMTPSession:
+    """
+    Keeps one logged-in connection to Gmail's SMTP server open, so a batch of
+    password reset emails shares a single connect + TLS + login.
+    
+    Usage:
+        with SMTPSession() as session:
+            for email, reset_token in resets:
+                session.send(email, reset_token)
     """
 
-    # Setup the email message
-    message = MIMEMultipart("alternative")
-    message["From"] = EMAIL_USER
-    message["To"] = email
-    message["Subject"] = subject
+    def __enter__(self):
+        self.server = smtplib.SMTP_SSL("smtp.gmail.com", 465)
+        try:
+            self.server.login(EMAIL_USER, EMAIL_PASSWORD)
+        except Exception:
+            self.server.close()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.server.quit()
+        except smtplib.SMTPException:
+            self.server.close()  # The server already dropped the connection
+
+    def send(self, email: str, reset_token: str):
+        """
+        Sends a password reset email over the open connection.
+        
+        Args:
+            email (str): Recipient's email address.
+            reset_token (str): Unique token for password reset.
+        """
+        message = build_message(email, reset_token)
+        self.server.sendmail(EMAIL_USER, email, message)
+        print(f"Password reset email sent to {email}")
 
-    # Attach the HTML content
-    message.attach(MIMEText(html_content, "html"))
+def send_password_reset_email(email: str, reset_token: str):
+    """
+    Sends a password reset email to the specified recipient.
+    
+    Args:
+        email (str): Recipient's email address.
+        reset_token (str): Unique token for password reset.
+    """
+    if not email or not reset_token:
+        raise ValueError("Email and reset token are required")
 
     try:
         # Connect to Gmail's SMTP server and send the email
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_USER, email, message.as_string())
-            print(f"Password reset email sent to {email}")
+        with SMTPSession() as session:
+            session.send(email, reset_token)
     except Exception as e:
         print(f"Failed to send email to {email}: {e}")
         raise RuntimeError("Error sending password reset email") from e
+
+async def send_password_reset_email_async(email: str, reset_token: str):
+    """
+    Sends a password reset email without blocking the event loop.
+    
+    Args:
+        email (str): Recipient's email address.
+        reset_token (str): Unique token for password reset.
+    """
+    import aiosmtplib  # Only needed for async sending
+
+    message = build_message(email, reset_token)
+
+    try:
+        await aiosmtplib.send(
+            message,
+            sender=EMAIL_USER,
+            recipients=[email],
+            hostname="smtp.gmail.com",
+            port=465,
+            use_tls=True,
+            username=EMAIL_USER,
+            password=EMAIL_PASSWORD,
+        )
+        print(f"Password reset email sent to {email}")
+    except Exception as e:
+        print(f"Failed to send email to {email}: {e}")
+        raise RuntimeError("Error sending password reset email") from e
+
+async def send_password_reset_emails(resets, max_connections: int = MAX_CONCURRENT_SENDS):
+    """
+    Sends a batch of password reset emails, a few at a time.
+    
+    Args:
+        resets: Iterable of (email, reset_token) pairs.
+        max_connections (int): Most SMTP connections open at once.
+    
+    Returns:
+        dict: Each email mapped to None if it was sent, or the exception if it failed.
+    """
+    resets = list(resets)
+    limit = asyncio.Semaphore(max_connections)
+
+    async def send(email, reset_token):
+        async with limit:
+            await send_password_reset_email_async(email, reset_token)
+
+    results = await asyncio.gather(
+        *(send(email, reset_token) for email, reset_token in resets),
+        return_exceptions=True,
+    )
+    return {email: result for (email, _), result in zip(resets, results)}
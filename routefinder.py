@@ -1,53 +1,204 @@
 import googlemaps
-import itertools
+from functools import lru_cache
+import numpy as np
+
+# numba compiles the route search loops to native code; without it they run as plain Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda function: function
+
+# Above this many locations the exact search gets too slow (it grows as n^2 * 2^n),
+# so the route is found with a fast heuristic instead
+HELD_KARP_LIMIT = 15
+
+# Google Maps distance matrix limits: locations per side and elements (origins x destinations) per request
+MAX_MATRIX_LOCATIONS = 25
+MAX_MATRIX_ELEMENTS = 100
+
+@lru_cache(maxsize=4)
+def get_client(api_key):
+    """
+    Get a Google Maps client for the API key, reusing it (and its open HTTPS connection) across calls.
+    """
+    return googlemaps.Client(key=api_key, timeout=10)
 
 def get_distance_matrix(api_key, locations):
     """
     Get the distance matrix between locations using Google Maps API.
     """
-    gmaps = googlemaps.Client(key=api_key)
-    matrix = gmaps.distance_matrix(locations, locations, mode="driving")
-    return matrix
+    gmaps = get_client(api_key)
+    if len(locations) ** 2 <= MAX_MATRIX_ELEMENTS:
+        return gmaps.distance_matrix(locations, locations, mode="driving")
+
+    # Too many locations for one request: ask for the matrix in blocks that fit
+    # the API limits and stitch the rows back together
+    rows = [{"elements": []} for _ in locations]
+    for dest_start in range(0, len(locations), MAX_MATRIX_LOCATIONS):
+        destinations = locations[dest_start:dest_start + MAX_MATRIX_LOCATIONS]
+        origins_per_request = min(MAX_MATRIX_LOCATIONS, MAX_MATRIX_ELEMENTS // len(destinations))
+        for origin_start in range(0, len(locations), origins_per_request):
+            origins = locations[origin_start:origin_start + origins_per_request]
+            block = gmaps.distance_matrix(origins, destinations, mode="driving")
+            for i, row in enumerate(block["rows"]):
+                rows[origin_start + i]["elements"].extend(row["elements"])
+    return {"rows": rows}
+
+def distance_array(distance_matrix):
+    """
+    Copy the distances (in meters) out of a Google Maps distance matrix into a NumPy array,
+    so the route search can index them with plain integers.
+    """
+    return np.array(
+        [[element["distance"]["value"] for element in row["elements"]] for row in distance_matrix["rows"]],
+        dtype=np.int32,
+    )
+
+# Marks a (subset, end) pair in the Held-Karp table that no path reaches yet
+UNREACHABLE = np.iinfo(np.int64).max
 
-def calculate_best_route(distance_matrix, locations):
+@njit(cache=True)
+def held_karp(distances):
     """
-    Determine the best route (shortest) between the given locations.
+    Find the shortest route that visits every location once (starting and ending anywhere)
+    using Held-Karp dynamic programming. Returns the route as location indices and its distance.
     """
-    # Extract distance information
-    distances = [
-        [row["elements"][j]["distance"]["value"] for j in range(len(row["elements"]))]
-        for row in distance_matrix["rows"]
-    ]
+    # best[mask, j] is the shortest path that visits exactly the locations in
+    # `mask` (a bitmask) and ends at location j
+    n = distances.shape[0]
+    full_mask = (1 << n) - 1
+    best = np.full((1 << n, n), UNREACHABLE, dtype=np.int64)
+    parent = np.full((1 << n, n), -1, dtype=np.int8)
+
+    # A route can start at any location
+    for j in range(n):
+        best[1 << j, j] = 0
+
+    # Every subset is numerically smaller than its supersets, so visiting
+    # masks in increasing order finishes each one before it is extended
+    for mask in range(1, full_mask + 1):
+        for j in range(n):
+            if not mask & (1 << j) or best[mask, j] == UNREACHABLE:
+                continue
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                next_mask = mask | (1 << k)
+                total_distance = best[mask, j] + distances[j, k]
+                if total_distance < best[next_mask, k]:
+                    best[next_mask, k] = total_distance
+                    parent[next_mask, k] = j
+
+    # Pick the best place to finish, then walk the parents back to the start
+    last = np.argmin(best[full_mask])
+    shortest_distance = best[full_mask, last]
 
-    # Get all permutations of the locations
-    permutations = list(itertools.permutations(range(len(locations))))
+    route = np.empty(n, dtype=np.int64)
+    mask = full_mask
+    for i in range(n - 1, -1, -1):
+        route[i] = last
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+    return route, shortest_distance
 
+def route_length(distances, route):
+    """
+    Total distance of travelling the route (location indices) from start to finish.
+    """
+    return int(distances[route[:-1], route[1:]].sum())
+
+def nearest_neighbour_route(distances):
+    """
+    Build a route by always driving to the closest location not yet visited,
+    trying every starting location and keeping the shortest result.
+    """
+    n = distances.shape[0]
     best_route = None
-    shortest_distance = float("inf")
+    best_length = None
+
+    for start in range(n):
+        route = np.empty(n, dtype=np.int64)
+        visited = np.zeros(n, dtype=bool)
+        route[0] = start
+        visited[start] = True
+        for step in range(1, n):
+            candidates = distances[route[step - 1]].astype(np.int64)
+            candidates[visited] = np.iinfo(np.int64).max
+            route[step] = np.argmin(candidates)
+            visited[route[step]] = True
+
+        length = route_length(distances, route)
+        if best_length is None or length < best_length:
+            best_route, best_length = route, length
+
+    return best_route
 
-    # Calculate the total distance for each route permutation
-    for perm in permutations:
-        total_distance = 0
-        for i in range(len(perm) - 1):
-            total_distance += distances[perm[i]][perm[i + 1]]
+@njit(cache=True)
+def two_opt(distances, route):
+    """
+    Improve a route in place by reversing stretches of it (2-opt) for as long as that makes it shorter.
+    Driving distances aren't symmetric, so the reversed stretch is re-measured in its new direction.
+    """
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            forward = 0  # Length of route[i..k] as it is driven now
+            backward = 0  # Length of route[i..k] driven in reverse
+            for k in range(i + 1, n):
+                forward += distances[route[k - 1], route[k]]
+                backward += distances[route[k], route[k - 1]]
+
+                # Compare the route with and without route[i..k] reversed
+                current, reversed_ = forward, backward
+                if i > 0:
+                    current += distances[route[i - 1], route[i]]
+                    reversed_ += distances[route[i - 1], route[k]]
+                if k < n - 1:
+                    current += distances[route[k], route[k + 1]]
+                    reversed_ += distances[route[i], route[k + 1]]
+
+                if reversed_ < current:
+                    route[i:k + 1] = route[i:k + 1][::-1].copy()
+                    forward, backward = backward, forward
+                    improved = True
+    return route
 
-        # Update the best route if the total distance is shorter
-        if total_distance < shortest_distance:
-            shortest_distance = total_distance
-            best_route = perm
+def calculate_best_route(distances, locations):
+    """
+    Determine the best route (shortest) between the given locations,
+    given their distances as a NumPy array (see distance_array).
+    Exact up to HELD_KARP_LIMIT locations, a nearest-neighbour + 2-opt estimate above that.
+    """
+    if len(locations) <= HELD_KARP_LIMIT:
+        best_route, shortest_distance = held_karp(distances)
+    else:
+        best_route = two_opt(distances, nearest_neighbour_route(distances))
+        shortest_distance = route_length(distances, best_route)
 
     # Convert indices back to location names
     best_route_locations = [locations[i] for i in best_route]
-    return best_route_locations, shortest_distance
+    return best_route_locations, int(shortest_distance)
+
+if NUMBA_AVAILABLE:
+    # Compile now (or load the cached build) rather than on the first real route
+    held_karp(np.zeros((2, 2), dtype=np.int32))
+    two_opt(np.zeros((2, 2), dtype=np.int32), np.arange(2, dtype=np.int64))
 
 if __name__ == "__main__":
     # Input Google Maps API key
     API_KEY = input("Enter your Google Maps API key: ")
 
     # Input locations
-    print("Enter between 2 and 10 locations (type 'done' when finished):")
+    print("Enter at least 2 locations (type 'done' when finished):")
     locations = []
-    while len(locations) < 10:
+    while True:
         location = input(f"Location {len(locations) + 1}: ").strip()
         if location.lower() == 'done':
             if len(locations) >= 2:
@@ -62,10 +213,10 @@ if __name__ == "__main__":
     else:
         # Get the distance matrix
         try:
-            distance_matrix = get_distance_matrix(API_KEY, locations)
+            distances = distance_array(get_distance_matrix(API_KEY, locations))
 
             # Calculate the best route
-            best_route, shortest_distance = calculate_best_route(distance_matrix, locations)
+            best_route, shortest_distance = calculate_best_route(distances, locations)
 
             # Display the results
             print("\nBest Route:")
@@ -0,0 +1,14 @@
+// Piscina worker: runs ImageProcessor.compressImage on a worker thread
+// so CPU-bound compression never blocks the main event loop.
+
+import { ImageProcessor } from './image-processor';
+
+export default async ({
+  imagePath,
+  maxSizeMb,
+}: {
+  imagePath: string;
+  maxSizeMb: number;
+}): Promise<string> => {
+  return ImageProcessor.compressImage(imagePath, maxSizeMb);
+};